@@ -1,25 +1,91 @@
 # app.py
 import logging
-from decimal import Decimal, InvalidOperation
-from datetime import datetime, timedelta
+import os
+import time
+from collections import defaultdict
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
 
-from flask import Flask, request, jsonify
+import orjson
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func, and_
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import (
+    bindparam, event, exists, func, and_, insert, lambda_stmt, literal_column, select, text, update
+)
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import column, table
+
+# --- JSON Serialization ---
+
+def orjson_default(obj):
+    # Types orjson can't serialize natively; Decimal matches Flask's default (a string)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class OrjsonProvider(JSONProvider):
+    """
+    Routes jsonify and request.json through orjson's C implementation
+    instead of the stdlib json module.
+    """
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        # orjson only supports 2-space indentation, so any indent maps to that
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=orjson_default, option=option).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Pretty-print in debug mode, like Flask's default provider
+        indent = 2 if self._app.debug else None
+        return self._app.response_class(self.dumps(obj, indent=indent), mimetype='application/json')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 # --- App Setup ---
 app = Flask(__name__)
-# Use an in-memory SQLite database for this example
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+app.json = OrjsonProvider(app)
+# Use DATABASE_URL when configured, otherwise an in-memory SQLite database for this example
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///:memory:')
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # Keep a warm pool of connections so requests skip connect / TLS setup;
+    # recycling replaces pre-ping so checkouts don't pay an extra round trip
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_recycle': 1800,
+        'pool_pre_ping': False
+    }
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Opt-in (PostgreSQL only): serve alerts from the mv_low_stock_alerts materialized
+# view in schema.sql. db.create_all() doesn't create it, and results lag by up to
+# one refresh interval, so the live query stays the default.
+app.config['LOW_STOCK_ALERTS_FROM_VIEW'] = os.environ.get('LOW_STOCK_ALERTS_FROM_VIEW', '').lower() in ('1', 'true')
 db = SQLAlchemy(app)
+# Use Redis when configured, otherwise fall back to a per-process cache
+app.config['CACHE_TYPE'] = 'RedisCache' if os.environ.get('CACHE_REDIS_URL') else 'SimpleCache'
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL')
+cache = Cache(app)
+
+LOW_STOCK_CACHE_TIMEOUT = 300
+# SimpleCache is per process, so an invalidation only reaches one worker;
+# without Redis keep the warehouse mapping short-lived to bound staleness
+WAREHOUSE_CACHE_TIMEOUT = 3600 if app.config['CACHE_TYPE'] == 'RedisCache' else 60
+LOW_STOCK_STREAM_BATCH_SIZE = 500
 
 
 # --- Model Definitions (Required for the app to run) ---
 # We need to define the models based on our schema from Part 2
 # so that SQLAlchemy can understand them.
 
+DEFAULT_LOW_STOCK_THRESHOLD = 10
+
 class Company(db.Model):
     __tablename__ = 'Companies'
     company_id = db.Column(db.Integer, primary_key=True)
@@ -39,6 +105,9 @@ class Product(db.Model):
     sku = db.Column(db.String(100), nullable=False, unique=True)
     name = db.Column(db.String(255), nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)
+    # Denormalized copy of ProductType.low_stock_threshold, kept in sync by
+    # the event hooks below, so the low-stock query doesn't need to join ProductTypes
+    low_stock_threshold = db.Column(db.Integer, nullable=False, default=DEFAULT_LOW_STOCK_THRESHOLD)
 
 class Inventory(db.Model):
     __tablename__ = 'Inventory'
@@ -46,14 +115,18 @@ class Inventory(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('Products.product_id'), nullable=False)
     warehouse_id = db.Column(db.Integer, db.ForeignKey('Warehouses.warehouse_id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=0)
-    __table_args__ = (db.UniqueConstraint('product_id', 'warehouse_id'),)
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'warehouse_id'),
+        # Covers the low-stock filter (warehouse + quantity) and the product join key
+        db.Index('ix_inventory_wh_qty', 'warehouse_id', 'quantity', postgresql_include=['product_id']),
+    )
 
 class ProductType(db.Model):
     __tablename__ = 'ProductTypes'
     product_type_id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('Companies.company_id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
-    low_stock_threshold = db.Column(db.Integer, nullable=False, default=10)
+    low_stock_threshold = db.Column(db.Integer, nullable=False, default=DEFAULT_LOW_STOCK_THRESHOLD)
 
 class Supplier(db.Model):
     __tablename__ = 'Suppliers'
@@ -70,7 +143,9 @@ class SalesOrder(db.Model):
     __tablename__ = 'SalesOrders'
     order_id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('Companies.company_id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Serves the "recent sales for a company" predicate
+    __table_args__ = (db.Index('ix_salesorders_company_created', 'company_id', 'created_at'),)
 
 class SalesOrderItems(db.Model):
     __tablename__ = 'SalesOrderItems'
@@ -81,6 +156,171 @@ class SalesOrderItems(db.Model):
     price_at_sale = db.Column(db.Numeric(10, 2), nullable=False)
 
 
+# --- Denormalization Hooks ---
+# Products copy the threshold of their ProductType on insert / type change,
+# and a threshold change on a ProductType is pushed down to its products.
+# These are ORM flush events: Core insert()/update() statements bypass them.
+# The product endpoints insert with Core but never set product_type_id, so
+# the column default is already correct for the products they create.
+
+@event.listens_for(Product, 'before_insert')
+@event.listens_for(Product, 'before_update')
+def sync_product_low_stock_threshold(mapper, connection, target):
+    if not db.inspect(target).attrs.product_type_id.history.has_changes():
+        return
+    if target.product_type_id is None:
+        # Type cleared: drop the old type's threshold
+        threshold = DEFAULT_LOW_STOCK_THRESHOLD
+    else:
+        threshold = connection.scalar(
+            select(ProductType.low_stock_threshold)
+            .where(ProductType.product_type_id == target.product_type_id)
+        )
+    if threshold is not None and threshold != target.low_stock_threshold:
+        target.low_stock_threshold = threshold
+        mark_cache_stale(db.inspect(target).session, invalidate_low_stock_alerts, target.company_id)
+
+@event.listens_for(ProductType, 'after_update')
+def propagate_low_stock_threshold(mapper, connection, target):
+    if not db.inspect(target).attrs.low_stock_threshold.history.has_changes():
+        return
+    connection.execute(
+        update(Product)
+        .where(Product.product_type_id == target.product_type_id)
+        .values(low_stock_threshold=target.low_stock_threshold)
+    )
+    mark_cache_stale(db.inspect(target).session, invalidate_low_stock_alerts, target.company_id)
+
+
+# --- Caching Helpers ---
+
+def low_stock_cache_key(company_id):
+    # Bucket by the cache timeout so the key is stable for the whole window
+    bucket = int(time.time() // LOW_STOCK_CACHE_TIMEOUT)
+    return f"lowstock:{company_id}:{bucket}"
+
+def invalidate_low_stock_alerts(company_id):
+    cache.delete(low_stock_cache_key(company_id))
+
+def is_successful_response(rv):
+    # Error responses are returned as (body, status) tuples; only cache successes
+    return not isinstance(rv, tuple)
+
+def company_warehouses_cache_key(company_id):
+    return f"warehouses:{company_id}"
+
+def get_company_warehouses(company_id):
+    """
+    Returns a {warehouse_id: name} dict for a company.
+    Warehouses rarely change, so the mapping is cached and lets the alerts
+    query filter on Inventory.warehouse_id instead of joining Warehouses.
+    """
+    key = company_warehouses_cache_key(company_id)
+    warehouses = cache.get(key)
+    if warehouses is None:
+        rows = db.session.execute(
+            select(Warehouse.warehouse_id, Warehouse.name)
+            .where(Warehouse.company_id == company_id)
+        )
+        warehouses = {warehouse_id: name for (warehouse_id, name) in rows}
+        cache.set(key, warehouses, timeout=WAREHOUSE_CACHE_TIMEOUT)
+    return warehouses
+
+def invalidate_company_warehouses(company_id):
+    cache.delete(company_warehouses_cache_key(company_id))
+
+def mark_cache_stale(session, invalidate, company_id):
+    """
+    Queues invalidate(company_id) to run once the session commits.
+    Deleting during the flush would let a concurrent request re-cache the
+    old committed data before this transaction becomes visible.
+    """
+    session.info.setdefault('stale_cache', set()).add((invalidate, company_id))
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_stale_cache(session):
+    for invalidate, company_id in session.info.pop('stale_cache', ()):
+        invalidate(company_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_stale_cache(session):
+    session.info.pop('stale_cache', None)
+
+@event.listens_for(Warehouse, 'after_insert')
+@event.listens_for(Warehouse, 'after_update')
+@event.listens_for(Warehouse, 'after_delete')
+def mark_company_warehouses_stale(mapper, connection, target):
+    session = db.inspect(target).session
+    # Include the previous owner if the warehouse moved between companies
+    history = db.inspect(target).attrs.company_id.history
+    for company_id in {target.company_id, *history.deleted}:
+        mark_cache_stale(session, invalidate_company_warehouses, company_id)
+        # Cached alert responses embed warehouse names
+        mark_cache_stale(session, invalidate_low_stock_alerts, company_id)
+
+
+def mark_company_alerts_stale(connection, target, company_column, key_column, key_attr):
+    """
+    Queues alert invalidation for the companies owning target's parent row
+    (current and previous, if the foreign key moved).
+    """
+    history = getattr(db.inspect(target).attrs, key_attr).history
+    keys = {getattr(target, key_attr), *history.deleted} - {None}
+    company_ids = connection.scalars(
+        select(company_column).where(key_column.in_(keys)).distinct()
+    ) if keys else ()
+    session = db.inspect(target).session
+    for company_id in company_ids:
+        mark_cache_stale(session, invalidate_low_stock_alerts, company_id)
+
+@event.listens_for(Inventory, 'after_insert')
+@event.listens_for(Inventory, 'after_update')
+@event.listens_for(Inventory, 'after_delete')
+def mark_inventory_alerts_stale(mapper, connection, target):
+    mark_company_alerts_stale(
+        connection, target, Warehouse.company_id, Warehouse.warehouse_id, 'warehouse_id'
+    )
+
+@event.listens_for(SalesOrder, 'after_insert')
+@event.listens_for(SalesOrder, 'after_update')
+@event.listens_for(SalesOrder, 'after_delete')
+def mark_sales_order_alerts_stale(mapper, connection, target):
+    session = db.inspect(target).session
+    history = db.inspect(target).attrs.company_id.history
+    for company_id in {target.company_id, *history.deleted}:
+        mark_cache_stale(session, invalidate_low_stock_alerts, company_id)
+
+@event.listens_for(SalesOrderItems, 'after_insert')
+@event.listens_for(SalesOrderItems, 'after_update')
+@event.listens_for(SalesOrderItems, 'after_delete')
+def mark_sales_order_item_alerts_stale(mapper, connection, target):
+    mark_company_alerts_stale(
+        connection, target, SalesOrder.company_id, SalesOrder.order_id, 'order_id'
+    )
+
+
+# --- Request Schemas ---
+# Request bodies are parsed straight from the raw bytes with model_validate_json,
+# so JSON decoding and type casting both run in pydantic's compiled core
+# without building an intermediate dict.
+
+class CreateProductIn(BaseModel):
+    name: str
+    sku: str
+    price: Decimal
+    warehouse_id: int
+    initial_quantity: int = Field(ge=0)
+
+class CreateProductsBulkIn(BaseModel):
+    products: list[CreateProductIn] = Field(min_length=1)
+
+def validation_error_response(e):
+    return jsonify({
+        "error": "Invalid product data",
+        "details": e.errors(include_url=False, include_context=False, include_input=False)
+    }), 400
+
+
 # --- API Endpoint 1 (Part 1 Solution) ---
 @app.route('/api/products', methods=['POST'])
 def create_product():
@@ -88,54 +328,51 @@ def create_product():
     Creates a new product and its initial inventory record.
     Ensures the operation is atomic and all inputs are validated.
     """
-    data = request.json
-    
-    # 1. Input Validation
-    required_fields = ['name', 'sku', 'price', 'warehouse_id', 'initial_quantity']
-    missing_fields = []
-    for field in required_fields:
-        if field not in data:
-            missing_fields.append(field)
-            
-    if missing_fields:
-        return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
-
-    # 2. Sanitize & Type Cast Inputs
+    # 1. Input Validation & 2. Type Casting
     try:
-        product_name = str(data['name'])
-        product_sku = str(data['sku'])
-        product_price = Decimal(data['price'])
-        warehouse_id = int(data['warehouse_id'])
-        initial_quantity = int(data['initial_quantity'])
-
-        if initial_quantity < 0:
-            return jsonify({"error": "initial_quantity cannot be negative"}), 400
-        
-    except (InvalidOperation, ValueError, TypeError):
-        return jsonify({"error": "Invalid data type for price, warehouse_id, or initial_quantity"}), 400
+        payload = CreateProductIn.model_validate_json(request.get_data())
+    except ValidationError as e:
+        return validation_error_response(e)
+    product_name = payload.name
+    product_sku = payload.sku
+    product_price = payload.price
+    warehouse_id = payload.warehouse_id
+    initial_quantity = payload.initial_quantity
 
     # 3. Atomic Transaction Block
     try:
-        product = Product(
-            name=product_name,
-            sku=product_sku,
-            price=product_price
-            # Note: company_id would also be needed in a real app
+        # The product belongs to the company that owns its warehouse
+        company_id = db.session.scalar(
+            select(Warehouse.company_id).where(Warehouse.warehouse_id == warehouse_id)
         )
-        db.session.add(product)
-        db.session.flush() 
+        if company_id is None:
+            return jsonify({"error": f"Warehouse {warehouse_id} not found"}), 404
+
+        product_id = db.session.execute(
+            insert(Product)
+            .values(
+                company_id=company_id,
+                name=product_name,
+                sku=product_sku,
+                price=product_price
+            )
+            .returning(Product.product_id)
+        ).scalar_one()
         
-        inventory = Inventory(
-            product_id=product.product_id,
-            warehouse_id=warehouse_id,
-            quantity=initial_quantity
+        db.session.execute(
+            insert(Inventory)
+            .values(
+                product_id=product_id,
+                warehouse_id=warehouse_id,
+                quantity=initial_quantity
+            )
         )
-        db.session.add(inventory)
+        mark_cache_stale(db.session, invalidate_low_stock_alerts, company_id)
         db.session.commit() 
         
         return jsonify({
             "message": "Product and initial inventory created successfully",
-            "product_id": product.product_id
+            "product_id": product_id
         }), 201
 
     except IntegrityError as e:
@@ -149,88 +386,335 @@ def create_product():
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 
+@app.route('/api/products/bulk', methods=['POST'])
+def create_products_bulk():
+    """
+    Creates many products and their initial inventory records at once.
+    Uses bulk Core INSERTs in a single transaction instead of a flush per
+    product. On PostgreSQL the product INSERT ... RETURNING is batched into
+    multi-row statements; SQLite falls back to one statement per row.
+    """
+    # 1. Validate every item before touching the database
+    try:
+        rows = CreateProductsBulkIn.model_validate_json(request.get_data()).products
+    except ValidationError as e:
+        return validation_error_response(e)
+
+    # 2. Atomic Transaction Block
+    try:
+        # Each product belongs to the company that owns its warehouse
+        warehouse_ids = {row.warehouse_id for row in rows}
+        company_by_warehouse = dict(db.session.execute(
+            select(Warehouse.warehouse_id, Warehouse.company_id)
+            .where(Warehouse.warehouse_id.in_(warehouse_ids))
+        ).all())
+        unknown_warehouse_ids = sorted(warehouse_ids - company_by_warehouse.keys())
+        if unknown_warehouse_ids:
+            return jsonify({
+                "error": f"Warehouses not found: {', '.join(map(str, unknown_warehouse_ids))}"
+            }), 404
+
+        product_ids = db.session.scalars(
+            insert(Product).returning(Product.product_id, sort_by_parameter_order=True),
+            [
+                {
+                    "company_id": company_by_warehouse[row.warehouse_id],
+                    "name": row.name,
+                    "sku": row.sku,
+                    "price": row.price
+                }
+                for row in rows
+            ]
+        ).all()
+
+        db.session.execute(
+            insert(Inventory),
+            [
+                {
+                    "product_id": product_id,
+                    "warehouse_id": row.warehouse_id,
+                    "quantity": row.initial_quantity
+                }
+                for product_id, row in zip(product_ids, rows)
+            ]
+        )
+        for company_id in set(company_by_warehouse.values()):
+            mark_cache_stale(db.session, invalidate_low_stock_alerts, company_id)
+        db.session.commit()
+
+        return jsonify({
+            "message": f"{len(product_ids)} products and initial inventory created successfully",
+            "product_ids": product_ids
+        }), 201
+
+    except IntegrityError as e:
+        db.session.rollback()
+        if 'UNIQUE constraint failed: Products.sku' in str(e) or 'products_sku_key' in str(e):
+            return jsonify({"error": "One or more product SKUs already exist"}), 409
+        return jsonify({"error": "Database integrity error"}), 500
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error bulk creating products: {e}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+
+# --- Low-Stock Alert Queries ---
+# Built through lambda_stmt so SQLAlchemy caches the constructed statement and
+# its compiled SQL across requests; per-request values are bound parameters.
+
+RECENT_DAYS = 30
+
+def days_until_stockout_column(recent_sales_cte):
+    # days_until_stockout = quantity / (total_sold / RECENT_DAYS), computed in SQL.
+    # Floor division stays in integers, and NULLIF yields NULL instead of
+    # dividing by zero.
+    return (
+        (Inventory.quantity * RECENT_DAYS)
+        // func.nullif(recent_sales_cte.c.total_sold_recent, 0, type_=db.Integer)
+    ).label('days_until_stockout')
+
+def low_stock_conditions():
+    return (
+        # Untyped products have no threshold rule, matching the old ProductTypes inner join
+        Product.product_type_id.isnot(None),
+        Inventory.quantity <= Product.low_stock_threshold
+    )
+
+def build_low_stock_alerts_query():
+    # CTE: Aggregate recent sales once, one row per product.
+    # MATERIALIZED stops PostgreSQL 12+ from inlining it into the main query.
+    recent_sales_cte = select(
+        SalesOrderItems.product_id,
+        func.sum(SalesOrderItems.quantity).label('total_sold_recent')
+    ).join(SalesOrder, SalesOrder.order_id == SalesOrderItems.order_id) \
+     .where(
+        SalesOrder.company_id == bindparam('company_id'),
+        SalesOrder.created_at >= bindparam('cutoff_date')
+     ) \
+     .group_by(SalesOrderItems.product_id) \
+     .cte('recent_sales') \
+     .prefix_with('MATERIALIZED', dialect='postgresql')
+
+    # Main query: exactly one row per (product, warehouse).
+    # Only the columns the response needs are selected, so no ORM objects are built.
+    alerts_query = select(
+        Product.product_id,
+        Product.name.label('product_name'),
+        Product.sku,
+        Inventory.warehouse_id,
+        Inventory.quantity.label('current_stock'),
+        Product.low_stock_threshold.label('threshold'),
+        days_until_stockout_column(recent_sales_cte)
+    ) \
+    .select_from(Inventory) \
+    .join(Product, Inventory.product_id == Product.product_id) \
+    .join(recent_sales_cte, Product.product_id == recent_sales_cte.c.product_id) \
+    .where(
+        # The company's warehouses come from the cached lookup, not a join
+        Inventory.warehouse_id.in_(bindparam('warehouse_ids', expanding=True)),
+        *low_stock_conditions()
+    )
+
+    return alerts_query
+
+def build_low_stock_alerts_view_definition():
+    """
+    The SELECT behind mv_low_stock_alerts: build_low_stock_alerts_query for
+    every company at once, with the cutoff evaluated at refresh time.
+    Shares its columns and conditions with the live query so the two can't drift.
+    """
+    recent_sales_cte = select(
+        SalesOrder.company_id,
+        SalesOrderItems.product_id,
+        func.sum(SalesOrderItems.quantity).label('total_sold_recent')
+    ).join(SalesOrder, SalesOrder.order_id == SalesOrderItems.order_id) \
+     .where(SalesOrder.created_at >= func.now() - literal_column(f"INTERVAL '{RECENT_DAYS} days'")) \
+     .group_by(SalesOrder.company_id, SalesOrderItems.product_id) \
+     .cte('recent_sales') \
+     .prefix_with('MATERIALIZED', dialect='postgresql')
+
+    return select(
+        Warehouse.company_id,
+        Product.product_id,
+        Product.name.label('product_name'),
+        Product.sku,
+        Inventory.warehouse_id,
+        Inventory.quantity.label('current_stock'),
+        Product.low_stock_threshold.label('threshold'),
+        days_until_stockout_column(recent_sales_cte)
+    ) \
+    .select_from(Inventory) \
+    .join(Warehouse, Inventory.warehouse_id == Warehouse.warehouse_id) \
+    .join(Product, Inventory.product_id == Product.product_id) \
+    .join(
+        recent_sales_cte,
+        and_(
+            Product.product_id == recent_sales_cte.c.product_id,
+            Warehouse.company_id == recent_sales_cte.c.company_id
+        )
+    ) \
+    .where(*low_stock_conditions())
+
+# Precomputed alerts for every company, created by `flask create-low-stock-alerts-view`
+# and refreshed by `flask refresh-low-stock-alerts`.
+# Same columns as build_low_stock_alerts_query, plus company_id.
+low_stock_alerts_view = table(
+    'mv_low_stock_alerts',
+    column('company_id'),
+    column('product_id'),
+    column('product_name'),
+    column('sku'),
+    column('warehouse_id'),
+    column('current_stock'),
+    column('threshold'),
+    column('days_until_stockout')
+)
+
+def build_low_stock_alerts_view_query():
+    return select(
+        low_stock_alerts_view.c.product_id,
+        low_stock_alerts_view.c.product_name,
+        low_stock_alerts_view.c.sku,
+        low_stock_alerts_view.c.warehouse_id,
+        low_stock_alerts_view.c.current_stock,
+        low_stock_alerts_view.c.threshold,
+        low_stock_alerts_view.c.days_until_stockout
+    ) \
+    .where(low_stock_alerts_view.c.company_id == bindparam('company_id'))
+
+def build_product_suppliers_query():
+    return select(
+        ProductSuppliers.product_id,
+        Supplier.supplier_id,
+        Supplier.name,
+        Supplier.contact_email
+    ) \
+    .join(Supplier, ProductSuppliers.supplier_id == Supplier.supplier_id) \
+    .where(ProductSuppliers.product_id.in_(bindparam('product_ids', expanding=True))) \
+    .order_by(ProductSuppliers.product_id, Supplier.supplier_id)
+
+
 # --- API Endpoint 2 (Part 3 Solution) ---
+
+def wants_ndjson_response():
+    # Plain JSON stays the default; NDJSON streaming is opt-in via the Accept header
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return best == 'application/x-ndjson'
+
+def fetch_low_stock_alert_rows(company_id, warehouse_ids, **execution_options):
+    """
+    Runs the alerts query for a company, from the materialized view when enabled.
+    Returns the SQLAlchemy Result so callers can either fetch all rows or stream them.
+    """
+    if app.config['LOW_STOCK_ALERTS_FROM_VIEW']:
+        stmt = lambda_stmt(build_low_stock_alerts_view_query)
+        params = {"company_id": company_id}
+    else:
+        stmt = lambda_stmt(build_low_stock_alerts_query)
+        params = {
+            "company_id": company_id,
+            "cutoff_date": datetime.now(timezone.utc) - timedelta(days=RECENT_DAYS),
+            "warehouse_ids": warehouse_ids
+        }
+    return db.session.execute(stmt, params, execution_options=execution_options)
+
+def fetch_suppliers_by_product(product_ids):
+    # Suppliers: one batched lookup instead of joining them into the main query
+    suppliers_by_product = defaultdict(list)
+    if product_ids:
+        supplier_rows = db.session.execute(
+            lambda_stmt(build_product_suppliers_query),
+            {"product_ids": list(product_ids)}
+        )
+        for supplier in supplier_rows:
+            suppliers_by_product[supplier.product_id].append(supplier)
+    return suppliers_by_product
+
+def format_low_stock_alert(row, warehouses, suppliers_by_product):
+    # Report the primary (lowest id) supplier for reordering
+    supplier_info = None
+    suppliers = suppliers_by_product.get(row.product_id)
+    if suppliers:
+        supplier = suppliers[0]
+        supplier_info = {
+            "id": supplier.supplier_id,
+            "name": supplier.name,
+            "contact_email": supplier.contact_email
+        }
+
+    return {
+        "product_id": row.product_id,
+        "product_name": row.product_name,
+        "sku": row.sku,
+        "warehouse_id": row.warehouse_id,
+        "warehouse_name": warehouses.get(row.warehouse_id),
+        "current_stock": row.current_stock,
+        "threshold": row.threshold,
+        "days_until_stockout": row.days_until_stockout,
+        "supplier": supplier_info
+    }
+
+def stream_low_stock_alerts(company_id, warehouses):
+    """
+    Streams alerts as NDJSON, one alert per line. If the query fails mid-stream
+    the last line is an {"error": ...} object instead of an alert.
+    Rows are fetched from a server-side cursor in batches of
+    LOW_STOCK_STREAM_BATCH_SIZE, so peak memory is bounded by the batch
+    size rather than the number of alerts.
+    """
+    def generate():
+        if not warehouses:
+            return
+        try:
+            result = fetch_low_stock_alert_rows(
+                company_id, list(warehouses), yield_per=LOW_STOCK_STREAM_BATCH_SIZE
+            )
+            for batch in result.partitions():
+                suppliers_by_product = fetch_suppliers_by_product({row.product_id for row in batch})
+                for row in batch:
+                    alert = format_low_stock_alert(row, warehouses, suppliers_by_product)
+                    yield orjson.dumps(alert, default=orjson_default) + b'\n'
+        except Exception as e:
+            # The 200 status is already sent, so end with an error line
+            # clients can tell apart from a complete (but shorter) stream
+            logging.error(f"Error streaming low stock alerts for company {company_id}: {e}")
+            yield orjson.dumps({"error": "An unexpected error occurred"}) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/companies/<int:company_id>/alerts/low-stock', methods=['GET'])
+@cache.cached(
+    timeout=LOW_STOCK_CACHE_TIMEOUT,
+    key_prefix=lambda: low_stock_cache_key(request.view_args['company_id']),
+    response_filter=is_successful_response,
+    unless=wants_ndjson_response
+)
 def get_low_stock_alerts(company_id):
     
-    RECENT_DAYS = 30
-    cutoff_date = datetime.utcnow() - timedelta(days=RECENT_DAYS)
-
     try:
-        company = db.session.get(Company, company_id)
-        if not company:
+        # Existence check only: returns a boolean instead of hydrating a Company
+        company_exists = db.session.scalar(
+            select(exists().where(Company.company_id == company_id))
+        )
+        if not company_exists:
             return jsonify({"error": "Company not found"}), 404
 
-        # Subquery: Find recently sold products
-        recent_sales_subquery = db.session.query(
-            SalesOrderItems.product_id,
-            func.sum(SalesOrderItems.quantity).label('total_sold_recent')
-        ).join(SalesOrder, SalesOrder.order_id == SalesOrderItems.order_id) \
-         .filter(
-            SalesOrder.company_id == company_id,
-            SalesOrder.created_at >= cutoff_date
-         ) \
-         .group_by(SalesOrderItems.product_id) \
-         .subquery()
-
-        # Main query
-        alerts_query = db.session.query(
-            Product,
-            Warehouse,
-            Inventory,
-            ProductType,
-            recent_sales_subquery.c.total_sold_recent,
-            Supplier 
-        ) \
-        .join(Warehouse, Inventory.warehouse_id == Warehouse.warehouse_id) \
-        .join(Product, Inventory.product_id == Product.product_id) \
-        .join(ProductType, Product.product_type_id == ProductType.product_type_id) \
-        .join(recent_sales_subquery, Product.product_id == recent_sales_subquery.c.product_id) \
-        .outerjoin(ProductSuppliers, Product.product_id == ProductSuppliers.product_id) \
-        .outerjoin(Supplier, ProductSuppliers.supplier_id == Supplier.supplier_id) \
-        .filter(
-            Warehouse.company_id == company_id,
-            Inventory.quantity <= ProductType.low_stock_threshold
-        ) \
-        .group_by(
-            Product.product_id, 
-            Warehouse.warehouse_id, 
-            Inventory.inventory_id, 
-            ProductType.product_type_id, 
-            recent_sales_subquery.c.total_sold_recent, 
-            Supplier.supplier_id
-        )
+        warehouses = get_company_warehouses(company_id)
 
-        results = alerts_query.all()
+        if wants_ndjson_response():
+            return stream_low_stock_alerts(company_id, warehouses)
 
-        # Format response
-        alerts = []
-        for (product, warehouse, inventory, p_type, total_sold, supplier) in results:
-            avg_daily_sale = total_sold / RECENT_DAYS
-            days_until_stockout = None
-            
-            if avg_daily_sale > 0:
-                days_until_stockout = int(inventory.quantity // avg_daily_sale)
-            
-            supplier_info = None
-            if supplier:
-                supplier_info = {
-                    "id": supplier.supplier_id,
-                    "name": supplier.name,
-                    "contact_email": supplier.contact_email
-                }
+        results = []
+        if warehouses:
+            results = fetch_low_stock_alert_rows(company_id, list(warehouses)).all()
+
+        suppliers_by_product = fetch_suppliers_by_product({row.product_id for row in results})
 
-            alerts.append({
-                "product_id": product.product_id,
-                "product_name": product.name,
-                "sku": product.sku,
-                "warehouse_id": warehouse.warehouse_id,
-                "warehouse_name": warehouse.name,
-                "current_stock": inventory.quantity,
-                "threshold": p_type.low_stock_threshold,
-                "days_until_stockout": days_until_stockout,
-                "supplier": supplier_info
-            })
+        # Format response
+        alerts = [
+            format_low_stock_alert(row, warehouses, suppliers_by_product)
+            for row in results
+        ]
             
         return jsonify({
             "alerts": alerts,
@@ -242,6 +726,43 @@ def get_low_stock_alerts(company_id):
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 
+# --- CLI Commands ---
+@app.cli.command('create-low-stock-alerts-view')
+def create_low_stock_alerts_view():
+    """
+    Creates the mv_low_stock_alerts materialized view (PostgreSQL only).
+    The definition is compiled from build_low_stock_alerts_view_definition,
+    so table names and quoting match the models created by db.create_all().
+    """
+    definition = build_low_stock_alerts_view_definition().compile(
+        dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}
+    )
+    connection = db.session.connection()
+    connection.exec_driver_sql(
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS mv_low_stock_alerts AS {definition}"
+    )
+    # CONCURRENTLY refreshes need a unique index on the view
+    connection.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_mv_low_stock_alerts_product_wh "
+        "ON mv_low_stock_alerts (product_id, warehouse_id)"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_mv_low_stock_alerts_company "
+        "ON mv_low_stock_alerts (company_id)"
+    )
+    db.session.commit()
+
+@app.cli.command('refresh-low-stock-alerts')
+def refresh_low_stock_alerts():
+    """
+    Refreshes the mv_low_stock_alerts materialized view.
+    Meant to be scheduled (e.g. cron every 5 minutes); CONCURRENTLY keeps
+    the view readable while it rebuilds.
+    """
+    db.session.execute(text('REFRESH MATERIALIZED VIEW CONCURRENTLY mv_low_stock_alerts'))
+    db.session.commit()
+
+
 # --- Main entry point ---
 if __name__ == '__main__':
     with app.app_context():
@@ -21,7 +21,9 @@ CREATE TABLE Products (
     product_type_id INT REFERENCES ProductTypes(product_type_id),
     sku VARCHAR(100) NOT NULL UNIQUE,
     name VARCHAR(255) NOT NULL,
-    price NUMERIC(10, 2) NOT NULL DEFAULT 0.00
+    price NUMERIC(10, 2) NOT NULL DEFAULT 0.00,
+    -- Denormalized from ProductTypes so low-stock checks skip that join
+    low_stock_threshold INT NOT NULL DEFAULT 10
 );
 
 -- Links Products and Warehouses
@@ -33,6 +35,9 @@ CREATE TABLE Inventory (
     UNIQUE(product_id, warehouse_id)
 );
 
+-- Covers the low-stock filter (warehouse + quantity) and the product join key
+CREATE INDEX ix_inventory_wh_qty ON Inventory (warehouse_id, quantity) INCLUDE (product_id);
+
 -- For business rules like "low stock threshold"
 CREATE TABLE ProductTypes (
     product_type_id SERIAL PRIMARY KEY,
@@ -62,10 +67,19 @@ CREATE TABLE SalesOrders (
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Serves the "recent sales for a company" predicate
+CREATE INDEX ix_salesorders_company_created ON SalesOrders (company_id, created_at);
+
 CREATE TABLE SalesOrderItems (
     item_id SERIAL PRIMARY KEY,
     order_id INT NOT NULL REFERENCES SalesOrders(order_id),
     product_id INT NOT NULL REFERENCES Products(product_id),
     quantity INT NOT NULL,
     price_at_sale NUMERIC(10, 2) NOT NULL
-);
\ No newline at end of file
+);
+
+-- Precomputed low-stock alerts for every company (mv_low_stock_alerts) are only
+-- read when the app runs with LOW_STOCK_ALERTS_FROM_VIEW=1. The view and its
+-- indexes are created by `flask --app app create-low-stock-alerts-view`, which
+-- compiles the definition from the same SQLAlchemy models and RECENT_DAYS as the
+-- live query, so it is not duplicated here.